@@ -1,7 +1,7 @@
 import time
 import numpy as np
 import threading
-import queue
+import collections
 from commlink.publisher import Publisher
 from commlink.subscriber import Subscriber
 
@@ -11,15 +11,19 @@ def benchmark_integrated():
     topic = "integrated_bench"
     port = 6000
     iterations = 100
+    warmup = 10  # untimed iterations to fault in pages and warm up caches
 
     print(f"{'Mode':<10} | {'Mean Latency (ms)':<20} | {'FPS':<10}")
     print("-" * 50)
 
     for legacy_mode in [True, False]:
         # Setup Subscriber
-        rx_queue = queue.Queue()
+        # Single producer/single consumer: a deque plus an Event avoids Queue's lock per item.
+        rx = collections.deque(maxlen=1)
+        rx_ready = threading.Event()
         # Subscriber auto-detects mode.
-        sub = Subscriber("localhost", port=port, topics=[topic], buffer=False)
+        # buffer=True so get() blocks for each new message instead of returning the cached one.
+        sub = Subscriber("localhost", port=port, topics=[topic], buffer=True)
         
         running = True
         def sub_thread_func():
@@ -27,7 +31,8 @@ def benchmark_integrated():
                 try:
                     # We send (timestamp, data) to measure latency
                     t, payload = sub.get()
-                    rx_queue.put(payload)
+                    rx.append(payload)
+                    rx_ready.set()
                 except Exception:
                     break
         
@@ -40,13 +45,17 @@ def benchmark_integrated():
         
         latencies = []
         
-        for _ in range(iterations):
-            ts_start = time.time()
+        for i in range(warmup + iterations):
+            # perf_counter_ns is monotonic with ns resolution; both ends run in this process.
+            ts_start = time.perf_counter_ns()
             pub.publish(topic, (ts_start, data))
             
             # Block wait for receive
-            (ts_sent, _) = rx_queue.get()
-            latencies.append((time.time() - ts_sent) * 1000)
+            rx_ready.wait()
+            rx_ready.clear()
+            (ts_sent, _) = rx.popleft()
+            if i >= warmup:
+                latencies.append((time.perf_counter_ns() - ts_sent) / 1e6)
             
         mean_latency = np.mean(latencies)
         fps = 1000.0 / mean_latency if mean_latency > 0 else 0
@@ -3,64 +3,86 @@ import time
 import pickle
 import numpy as np
 import threading
-import queue
+import collections
 from commlink.publisher import Publisher
 from commlink.subscriber import Subscriber
 
-def generate_payloads():
+# Align payload buffers to the 2 MiB huge-page size so each one maps to as few pages as possible.
+ALIGNMENT = 2 * 1024 * 1024
+
+def aligned_empty(shape, dtype):
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    raw = np.empty(nbytes + ALIGNMENT, dtype=np.uint8)
+    offset = -raw.ctypes.data % ALIGNMENT
+    return raw[offset:offset + nbytes].view(dtype).reshape(shape)
+
+def filled(shape, dtype, values):
+    out = aligned_empty(shape, dtype)
+    np.copyto(out, values, casting="unsafe")
+    return out
+
+def _build_payloads():
     payloads = {}
     
     # RGB Image: 1280x720x3 uint8
-    payloads['rgb_720p'] = np.random.randint(0, 255, (720, 1280, 3), dtype=np.uint8)
+    payloads['rgb_720p'] = filled((720, 1280, 3), np.uint8, np.random.randint(0, 255, (720, 1280, 3)))
     
     # Depth Image: 1280x720 float16
-    payloads['depth_720p'] = np.random.rand(720, 1280).astype(np.float16)
+    payloads['depth_720p'] = filled((720, 1280), np.float16, np.random.rand(720, 1280))
     
     # Pose: 4x4 float64
     payloads['pose_4x4'] = np.eye(4, dtype=np.float64)
     
     # Point Cloud: 100k points (N, 3) float32 + Colors (N, 3) uint8
     N = 100000
-    points = np.random.rand(N, 3).astype(np.float32)
-    colors = np.random.randint(0, 255, (N, 3), dtype=np.uint8)
+    points = filled((N, 3), np.float32, np.random.rand(N, 3))
+    colors = filled((N, 3), np.uint8, np.random.randint(0, 255, (N, 3)))
     payloads['point_cloud'] = {'points': points, 'colors': colors}
     
     return payloads
 
+# Built once at import and reused, so every iteration sends the same, already-touched pages
+# and the measurements isolate serialization/transport from page-fault and RNG cost.
+PAYLOADS = _build_payloads()
+
+def generate_payloads():
+    return PAYLOADS
+
 def benchmark_serialization(payloads):
     print(f"{'Payload':<20} | {'Method':<10} | {'Size (MB)':<10} | {'Ser (ms)':<10} | {'Deser (ms)':<10}")
     print("-" * 75)
     
     for name, data in payloads.items():
         # Pickle
-        start = time.time()
+        start = time.perf_counter_ns()
         serialized = pickle.dumps(data)
-        ser_time = (time.time() - start) * 1000
+        ser_time = (time.perf_counter_ns() - start) / 1e6
         
         size_mb = len(serialized) / (1024 * 1024)
         
-        start = time.time()
+        start = time.perf_counter_ns()
         _ = pickle.loads(serialized)
-        deser_time = (time.time() - start) * 1000
+        deser_time = (time.perf_counter_ns() - start) / 1e6
         
         print(f"{name:<20} | {'Pickle':<10} | {size_mb:<10.2f} | {ser_time:<10.2f} | {deser_time:<10.2f}")
 
         # Numpy (if applicable)
         if isinstance(data, np.ndarray):
-            start = time.time()
+            start = time.perf_counter_ns()
             serialized = data.tobytes()
-            ser_time = (time.time() - start) * 1000
+            ser_time = (time.perf_counter_ns() - start) / 1e6
              
             size_mb = len(serialized) / (1024 * 1024)
             
-            start = time.time()
+            start = time.perf_counter_ns()
             _ = np.frombuffer(serialized, dtype=data.dtype).reshape(data.shape)
-            deser_time = (time.time() - start) * 1000
+            deser_time = (time.perf_counter_ns() - start) / 1e6
             
             print(f"{name:<20} | {'Numpy':<10} | {size_mb:<10.2f} | {ser_time:<10.2f} | {deser_time:<10.2f}")
     print("-" * 75)
 
-def benchmark_e2e_latency(payloads, iterations=100):
+def benchmark_e2e_latency(payloads, iterations=100, warmup=10):
     print(f"\nEnd-to-End Latency Benchmark ({iterations} iterations)")
     print(f"{'Payload':<20} | {'Mean Latency (ms)':<20} | {'FPS':<10}")
     print("-" * 60)
@@ -71,15 +93,19 @@ def benchmark_e2e_latency(payloads, iterations=100):
         topic = "bench_topic"
         
         # Setup Subscriber
-        rx_queue = queue.Queue()
-        sub = Subscriber("localhost", port=port, topics=[topic], buffer=False)
+        # Single producer/single consumer: a deque plus an Event avoids Queue's lock per item.
+        rx = collections.deque(maxlen=1)
+        rx_ready = threading.Event()
+        # buffer=True so get() blocks for each new message instead of returning the cached one.
+        sub = Subscriber("localhost", port=port, topics=[topic], buffer=True)
         
         running = True
         def sub_thread_func():
             while running:
                 try:
                     t, d = sub.get()
-                    rx_queue.put((t, d))
+                    rx.append((t, d))
+                    rx_ready.set()
                 except Exception:
                     break
         
@@ -92,8 +118,8 @@ def benchmark_e2e_latency(payloads, iterations=100):
         
         latencies = []
         
-        for _ in range(iterations):
-            start_time = time.time()
+        # The first `warmup` iterations are not recorded.
+        for i in range(warmup + iterations):
             # We pack the start time into the payload for accurate one-way latency?
             # Or just measure round trip if we had a rep-req.
             # Since this is Pub-Sub, we can measure "send start" to "recv end" in the same process
@@ -105,11 +131,15 @@ def benchmark_e2e_latency(payloads, iterations=100):
             # if we assume separate threads in same process share clock carefully.
             
             # For this single-process test, we can just track:
-            pub.publish(topic, (time.time(), data))
+            # perf_counter_ns is monotonic with ns resolution; both ends run in this process.
+            pub.publish(topic, (time.perf_counter_ns(), data))
             
             # Block wait for receive
-            _, (ts_sent, idx) = rx_queue.get()
-            latencies.append((time.time() - ts_sent) * 1000)
+            rx_ready.wait()
+            rx_ready.clear()
+            _, (ts_sent, idx) = rx.popleft()
+            if i >= warmup:
+                latencies.append((time.perf_counter_ns() - ts_sent) / 1e6)
             
         mean_latency = np.mean(latencies)
         fps = 1000.0 / mean_latency if mean_latency > 0 else 0
@@ -13,4 +13,4 @@ __all__ = [
     "RPCServer",
 ]
 
-__version__ = "0.1.0"
+__version__ = "0.3.0"
@@ -0,0 +1,26 @@
+import os
+import zmq
+
+
+def default_io_threads() -> int:
+    """
+    One ZMQ IO thread per four cores, so topologies with several subscribers
+    get parallel IO without oversubscribing small machines.
+    """
+    return max(1, (os.cpu_count() or 1) // 4)
+
+
+def shared_context() -> zmq.Context:
+    """
+    Return the process-wide ZMQ context shared by publishers and subscribers.
+    The context is created on first use and torn down at interpreter exit.
+    """
+    return zmq.Context.instance(io_threads=default_io_threads())
+
+
+def configure(io_threads: int):
+    """
+    Set the number of IO threads of the shared context.
+    Only takes effect if called before the first publisher/subscriber is created.
+    """
+    shared_context().set(zmq.IO_THREADS, io_threads)
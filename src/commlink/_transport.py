@@ -0,0 +1,58 @@
+import os
+import socket
+import tempfile
+from typing import Optional
+
+import zmq
+
+# Hosts that refer to this machine; "*" is only meaningful when binding.
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "*")
+
+
+def is_endpoint(host: str) -> bool:
+    """
+    Whether host is a full ZMQ endpoint (e.g. "ipc:///tmp/cam.sock") rather than a host name.
+    """
+    return "://" in host
+
+
+def endpoint(host: str, port: int) -> str:
+    """
+    The endpoint for host/port: host itself if it is already an endpoint, else TCP.
+    """
+    return host if is_endpoint(host) else f"tcp://{host}:{port}"
+
+
+def ipc_path(port: int) -> str:
+    return os.path.join(tempfile.gettempdir(), f"commlink-{port}.sock")
+
+
+def ipc_endpoint(port: int) -> str:
+    return f"ipc://{ipc_path(port)}"
+
+
+def want_ipc(host: str, ipc: Optional[bool]) -> bool:
+    """
+    Resolve the ipc flag: None means use IPC automatically for local hosts.
+    An explicit endpoint is used as given, without an extra IPC socket.
+    """
+    if is_endpoint(host):
+        return False
+    if ipc is None:
+        return host in LOCAL_HOSTS and zmq.has("ipc")
+    return ipc
+
+
+def ipc_listening(port: int) -> bool:
+    """
+    Check whether something accepts connections on the IPC socket for this port.
+    A leftover socket file from a dead process is not enough.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(ipc_path(port))
+        except OSError:
+            return False
+    return True
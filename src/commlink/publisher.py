@@ -1,19 +1,88 @@
 import zmq
-from typing import Any
-from commlink.serializer import serialize
+from typing import Any, Optional
+from commlink import _context, _transport
+from commlink.serializer import serialize_bytes
+
+# Upper bound on the number of encoded topics kept per publisher.
+_TOPIC_CACHE_SIZE = 1024
+
+# Upper bound on the number of serialized payloads kept per publisher with cache_payloads=True.
+_PAYLOAD_CACHE_SIZE = 64
 
 class Publisher:
-    def __init__(self, host: str, port: int = 5000, legacy_serializer: bool = False):
+    def __init__(
+        self,
+        host: str,
+        port: int = 5000,
+        legacy_serializer: bool = False,
+        track_sends: bool = False,
+        sndhwm: int = 100,
+        sndbuf: int = 8 * 1024 * 1024,
+        ipc: Optional[bool] = None,
+        msgpack_serializer: bool = False,
+        cache_payloads: bool = False,
+        zero_copy: bool = False,
+    ):
         """
-        host: host to connect to
-        port: port to connect to
+        host: host to bind to, or a full ZMQ endpoint (e.g. "ipc:///tmp/cam.sock"),
+              in which case port and ipc are ignored
+        port: port to bind to
         legacy_serializer: if True, use standard pickle.dumps (compatible with older commlinks).
                            if False (default), use ZMQ multipart messages and Pickle Protocol 5 for faster serialization.
+        track_sends: if True, out-of-band buffers (e.g. numpy arrays) are sent without copying and
+                     publish() blocks until ZMQ has finished sending them, so the arrays can be
+                     reused as soon as it returns.
+        sndhwm: maximum number of messages queued per subscriber before new ones are dropped.
+        sndbuf: kernel send buffer size in bytes (large frames such as images benefit from a big buffer).
+        ipc: also bind a unix domain socket for same-host subscribers, which skips the TCP stack.
+             None (default) enables it when host is local, True forces it, False disables it.
+        msgpack_serializer: if True, pack payloads with msgpack instead of pickle where possible
+                            (requires the msgpack package on both ends). Faster for small primitives,
+                            lists and dicts; arrays/tensors inside them are still sent without copying.
+        cache_payloads: if True, keep the serialized frames of recently published objects and resend them
+                        when the same object is published again on the same topic, skipping serialization.
+                        Only for data that is not modified after publishing: a changed object is not detected.
+        zero_copy: if True, send out-of-band buffers without copying and without waiting.
+                   Published arrays must then not be modified until ZMQ is done with them, which
+                   publish() gives no signal for. By default (and with track_sends=False) every
+                   frame is copied into the ZMQ message, so buffers can be reused right away.
         """
-        self.context = zmq.Context()
+        if legacy_serializer and msgpack_serializer:
+            raise ValueError("legacy_serializer and msgpack_serializer are mutually exclusive")
+        if msgpack_serializer:
+            # Fail here rather than on the first publish.
+            import msgpack
+        self.context = _context.shared_context()
         self.socket = self.context.socket(zmq.PUB)
-        self.socket.bind(f"tcp://{host}:{port}")
+        self.socket.setsockopt(zmq.SNDHWM, sndhwm)
+        self.socket.setsockopt(zmq.SNDBUF, sndbuf)
+        self.socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        self.socket.setsockopt(zmq.IMMEDIATE, 1)
+        # Don't keep undelivered messages around once the publisher is closed.
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(_transport.endpoint(host, port))
+        if _transport.want_ipc(host, ipc):
+            try:
+                self.socket.bind(_transport.ipc_endpoint(port))
+            except zmq.ZMQError:
+                # Automatic IPC is best-effort; TCP keeps working without it.
+                if ipc:
+                    raise
         self.legacy_serializer = legacy_serializer
+        self.msgpack_serializer = msgpack_serializer
+        self.track_sends = track_sends
+        self.zero_copy = zero_copy
+        self._topic_cache: dict[str, bytes] = {}
+        # (topic, id(data)) -> (data, frames); holding data keeps its id from being reused.
+        self._payload_cache: Optional[dict[tuple[str, int], tuple[Any, list]]] = {} if cache_payloads else None
+
+    @classmethod
+    def configure(cls, io_threads: int):
+        """
+        Set the number of ZMQ IO threads shared by all publishers and subscribers.
+        Must be called before the first Publisher/Subscriber is created.
+        """
+        _context.configure(io_threads)
 
     def publish(self, topic: str, data: Any):
         """
@@ -22,10 +91,63 @@ class Publisher:
             "data": object,
         }
         """
-        if " " in topic:
-            raise ValueError("topic cannot contain spaces")
-        frames = serialize(topic, data, legacy=self.legacy_serializer)
-        self.socket.send_multipart(frames)
+        if self._payload_cache is None:
+            frames = self._serialize(topic, data)
+        else:
+            frames = self._cached_frames(topic, data)
+        # copy=False hands the buffers to libzmq directly; pyzmq keeps a reference
+        # to each buffer until libzmq has released it, so the data stays alive, but the
+        # caller could still write into it mid-send. Unless that is ruled out by waiting
+        # (track_sends) or by the caller (zero_copy), frames are copied.
+        # The loop does what send_multipart does, minus its per-frame type-check pass
+        # (serialize only produces buffers).
+        send = self.socket.send
+        track = self.track_sends
+        copy = not (track or self.zero_copy)
+        last = len(frames) - 1
+        trackers = []
+        for i, frame in enumerate(frames):
+            tracker = send(frame, zmq.SNDMORE if i < last else 0, copy=copy, track=track)
+            if track and tracker is not None:
+                trackers.append(tracker)
+        for tracker in trackers:
+            tracker.wait()
+
+    def _serialize(self, topic: str, data: Any) -> list:
+        return serialize_bytes(
+            self._encode_topic(topic),
+            data,
+            legacy=self.legacy_serializer,
+            use_msgpack=self.msgpack_serializer,
+        )
+
+    def _cached_frames(self, topic: str, data: Any) -> list:
+        """
+        Return the frames last serialized for this exact object on this topic, serializing on a miss.
+        """
+        key = (topic, id(data))
+        entry = self._payload_cache.get(key)
+        if entry is not None and entry[0] is data:
+            return entry[1]
+        frames = self._serialize(topic, data)
+        if len(self._payload_cache) >= _PAYLOAD_CACHE_SIZE:
+            del self._payload_cache[next(iter(self._payload_cache))]
+        self._payload_cache[key] = (data, frames)
+        return frames
+
+    def _encode_topic(self, topic: str) -> bytes:
+        """
+        Return the encoded topic, validating and encoding it only on first use.
+        """
+        topic_bytes = self._topic_cache.get(topic)
+        if topic_bytes is None:
+            topic_bytes = topic.encode("utf-8")
+            if b" " in topic_bytes:
+                raise ValueError("topic cannot contain spaces")
+            if len(self._topic_cache) >= _TOPIC_CACHE_SIZE:
+                del self._topic_cache[next(iter(self._topic_cache))]
+            self._topic_cache[topic] = topic_bytes
+        return topic_bytes
 
     def __setitem__(self, topic: str, data: Any):
         """
@@ -33,6 +155,13 @@ class Publisher:
         """
         self.publish(topic, data)
 
+    def stop(self):
+        """
+        Close the socket. The shared context is left running for other
+        publishers/subscribers and is torn down at interpreter exit.
+        """
+        self.socket.close()
+
 
 if __name__ == "__main__":
     # Example usage:
@@ -1,4 +1,6 @@
 import zmq
+from typing import Optional
+from commlink import _transport
 from commlink.serializer import serialize, deserialize
 
 
@@ -13,14 +15,22 @@ class RPCException(Exception):
 
 
 class RPCClient:
-    def __init__(self, host: str, port: int = 5000):
+    def __init__(self, host: str, port: int = 5000, ipc: Optional[bool] = None):
         """
-        host: host to connect to
+        host: host to connect to, or a full ZMQ endpoint (e.g. "ipc:///tmp/robot.sock"),
+              in which case port and ipc are ignored
         port: port to connect to
+        ipc: connect over the server's unix domain socket instead of TCP.
+             None (default) uses it when host is local and the server is listening on it;
+             True forces it, False always uses TCP.
         """
         self.__dict__["context"] = zmq.Context()
         self.__dict__["socket"] = self.context.socket(zmq.REQ)
-        self.socket.connect(f"tcp://{host}:{port}")
+        if _transport.want_ipc(host, ipc) and (ipc or _transport.ipc_listening(port)):
+            self.__dict__["_endpoint"] = _transport.ipc_endpoint(port)
+        else:
+            self.__dict__["_endpoint"] = _transport.endpoint(host, port)
+        self.socket.connect(self._endpoint)
         self.__dict__["_is_callable_cache"] = {}
 
     def __setattr__(self, attr: str, value):
@@ -32,12 +42,19 @@ class RPCClient:
             raise AttributeError(f"Overwriting a callable attribute: {attr}")
         self._send_set(attr, value)
 
+    def _send(self, req: dict):
+        """
+        Send a request without copying its out-of-band buffers (e.g. numpy arrays).
+        REQ/REP only gets the reply after the request was delivered, so they are not reused early.
+        """
+        self.socket.send_multipart(serialize("rpc", req), copy=False)
+
     def _send_get(self, attr: str, args: list, kwargs: dict):
         """
         Send a get request over the socket.
         """
         req = {"req": "get", "attr": attr, "args": args, "kwargs": kwargs}
-        self.socket.send_multipart(serialize("rpc", req))
+        self._send(req)
         return self._recv_result()
 
     def _send_set(self, attr: str, value):
@@ -45,7 +62,7 @@ class RPCClient:
         Send a set request over the socket.
         """
         req = {"req": "set", "attr": attr, "value": value}
-        self.socket.send_multipart(serialize("rpc", req))
+        self._send(req)
         return self._recv_result()
 
     def _recv_result(self):
@@ -61,7 +78,7 @@ class RPCClient:
         }; re-raise the exception on the client side
         if type == "result", content is the result
         """
-        result = self.socket.recv_multipart()
+        result = self.socket.recv_multipart(copy=False)
         _, result = deserialize(result)
         if result["type"] == "exception":
             raise RPCException(
@@ -78,7 +95,7 @@ class RPCClient:
         """
         if attr not in self._is_callable_cache:
             req = {"req": "is_callable", "attr": attr}
-            self.socket.send_multipart(serialize("rpc", req))
+            self._send(req)
             result = self._recv_result()
             self._is_callable_cache[attr] = result
         return self._is_callable_cache[attr]
@@ -99,7 +116,7 @@ class RPCClient:
         Return a list of attributes.
         """
         req = {"req": "dir"}
-        self.socket.send_multipart(serialize("rpc", req))
+        self._send(req)
         result = self._recv_result()
         return result + ["stop_server"]
 
@@ -110,7 +127,7 @@ class RPCClient:
         Returns a bool for success.
         """
         req = {"req": "stop"}
-        self.socket.send_multipart(serialize("rpc", req))
+        self._send(req)
         stopped = self._recv_result()
         if stopped:
             self.socket.close()
@@ -2,21 +2,48 @@ import zmq
 import time
 import threading
 import traceback
+from typing import Optional
+from commlink import _transport
 from commlink.serializer import serialize, deserialize
 
+# How often the threaded server's receive loop checks for stop().
+_POLL_INTERVAL_MS = 10
+
 
 class RPCServer:
-    def __init__(self, obj, port: int = 5000, threaded: bool = True):
+    def __init__(
+        self,
+        obj,
+        port: int = 5000,
+        threaded: bool = True,
+        endpoint: Optional[str] = None,
+        ipc: Optional[bool] = None,
+    ):
         """
         obj: object with methods to expose
         port: port to listen on
+        endpoint: full ZMQ endpoint to bind instead (e.g. "ipc:///tmp/robot.sock"); port and ipc are then ignored
+        ipc: also listen on a unix domain socket, which same-host clients use instead of TCP.
+             None (default) enables it where supported, True forces it, False disables it.
         """
         self.obj = obj
         self.context = zmq.Context()
         self.socket: zmq.socket.Socket = self.context.socket(zmq.REP)
-        self.socket.bind(f"tcp://*:{port}")
+        if endpoint is not None:
+            self.socket.bind(endpoint)
+        else:
+            self.socket.bind(f"tcp://*:{port}")
+            if _transport.want_ipc("*", ipc):
+                try:
+                    self.socket.bind(_transport.ipc_endpoint(port))
+                except zmq.ZMQError:
+                    # Automatic IPC is best-effort; TCP keeps working without it.
+                    if ipc:
+                        raise
         self.threaded = threaded
         self.thread = None
+        # Set once the receive loop is running; start() waits for it in threaded mode.
+        self.ready = threading.Event()
         if threaded:
             self.stop_event = threading.Event()
         else:
@@ -40,6 +67,8 @@ class RPCServer:
     def _send_result(self, result):
         """
         Serialize a result and send it over the socket.
+        Frames are copied into the ZMQ message: the loop receives the next request right away,
+        and a method that refills and returns the same buffer must not tear this reply.
         """
         result = {"type": "result", "content": result}
         self.socket.send_multipart(serialize("rpc_result", result))
@@ -47,25 +76,31 @@ class RPCServer:
     def run(self):
         """
         Run the server.
+        The socket is only used from the thread running this loop, which also closes it
+        once stop() ends the loop.
         """
-        if self.threaded:
-            while not self.stop_event.is_set():
-                try:
-                    frames = self.socket.recv_multipart()
+        self.ready.set()
+        try:
+            if self.threaded:
+                while not self.stop_event.is_set():
+                    if not self.socket.poll(_POLL_INTERVAL_MS):
+                        continue
+                    frames = self.socket.recv_multipart(copy=False)
                     _, message = deserialize(frames)
                     
                     self._handle_message(message)
-                except zmq.ContextTerminated:
-                    break
-        else:
-            while not self.stop_event:
-                try:
-                    frames = self.socket.recv_multipart(flags=zmq.NOBLOCK)
-                    _, message = deserialize(frames)
-                except zmq.Again:
-                    time.sleep(0.001)
-                    continue
-                self._handle_message(message)
+            else:
+                while not self.stop_event:
+                    try:
+                        frames = self.socket.recv_multipart(flags=zmq.NOBLOCK, copy=False)
+                        _, message = deserialize(frames)
+                    except zmq.Again:
+                        time.sleep(0.001)
+                        continue
+                    self._handle_message(message)
+        finally:
+            self.ready.clear()
+            self._close()
 
     def _is_callable(self, attr):
         return hasattr(self.obj, attr) and callable(getattr(self.obj, attr))
@@ -119,24 +154,38 @@ class RPCServer:
             self.stop()
 
     def start(self):
+        """
+        Start serving. In threaded mode, returns once the background thread is receiving.
+        """
         if self.threaded:
             self.stop_event.clear()
             self.thread = threading.Thread(target=self.run)
             self.thread.start()
+            self.ready.wait()
         else:
             self.run()
 
     def stop(self):
-        self.socket.close()
-        self.context.term()
+        """
+        Stop the server. The receive loop closes the socket and terminates the context on its way out.
+        From another thread, stop() also waits for the background thread to finish.
+        """
         if self.threaded:
             self.stop_event.set()
-            if self.thread and threading.current_thread() is not self.thread:
+            if self.thread is None:
+                # Never started, so nothing else is using the socket.
+                self._close()
+            elif threading.current_thread() is not self.thread:
                 self.thread.join()
-            self.thread = None
+                self.thread = None
         else:
             self.stop_event = True
 
+    def _close(self):
+        if not self.socket.closed:
+            self.socket.close()
+            self.context.term()
+
 
 if __name__ == "__main__":
     import numpy as np
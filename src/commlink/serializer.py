@@ -1,7 +1,37 @@
+import copyreg
+import io
 import pickle
-from typing import Any, List, Tuple
+import struct
+import sys
+import threading
+from collections import ChainMap
+from typing import TYPE_CHECKING, Any, Callable, List, Optional, Sequence, Tuple, Union
 
-def serialize(topic: str, data: Any, legacy: bool = False) -> List[bytes]:
+if TYPE_CHECKING:
+    import zmq
+
+# Payloads that are a single array/tensor skip pickle entirely.
+# Wire format: [topic, header, raw_data], where the header is
+#   tag (6 bytes) | len(dtype_str) (u8) | ndim (u8) | dtype_str | shape (int64 little-endian)
+# A pickle stream never starts with a null byte, so the tags cannot be confused with one.
+_NDARR_TAG = b"\x00NDARR"
+_TORCH_TAG = b"\x00TORCH"
+_TAG_LEN = len(_NDARR_TAG)
+_HEADER_PREFIX = struct.Struct(f"<{_TAG_LEN}sBB")
+
+# Tag frame for payloads packed with msgpack (optional dependency).
+# Wire format: [topic, tag, packed, *array_data]; each array is an ext-type holding its
+# header, and its data is the next out-of-band frame, in packing order.
+_MSGPACK_TAG = b"\x00MSGPK"
+_MSGPACK_ARRAY_EXT = 1
+
+# Shape header packers keyed by ndim (numpy caps ndim at 64, so this stays small).
+_SHAPE_STRUCTS: dict[int, struct.Struct] = {}
+
+# How much of a single-frame legacy message is searched for the topic separator first.
+_TOPIC_SCAN_BYTES = 256
+
+def serialize(topic: str, data: Any, legacy: bool = False, use_msgpack: bool = False) -> List[Any]:
     """
     Serialize data.
     
@@ -10,48 +40,398 @@ def serialize(topic: str, data: Any, legacy: bool = False) -> List[bytes]:
         data: The object to serialize.
         legacy: If True, uses standard pickle.dumps and returns [topic_bytes, pickle_bytes].
                 If False (default), uses Pickle Protocol 5 + ZMQ Multipart [topic, main, *buffers].
+                A bare C-contiguous numpy array or CPU torch tensor is sent as
+                [topic, header, data] without going through pickle.
+        use_msgpack: If True, pack data with msgpack instead of pickle (requires the msgpack package).
+                Cheaper for small primitives, lists and dicts, which may also contain arrays/tensors.
+                Payloads msgpack cannot represent exactly (tuples, custom classes, ...) still use pickle.
+
+    Returns:
+        The message frames. The topic and stream frames are bytes; data frames may be memoryviews
+        or numpy uint8 views of the payload's own buffers (not copies), accepted by zmq's send_multipart.
+    """
+    return serialize_bytes(topic.encode("utf-8"), data, legacy=legacy, use_msgpack=use_msgpack)
+
+
+def serialize_bytes(topic_bytes: bytes, data: Any, legacy: bool = False, use_msgpack: bool = False) -> List[Any]:
+    """
+    Same as serialize(), but takes an already-encoded topic.
+    Lets callers that publish the same topic repeatedly skip the UTF-8 encode.
     """
-    topic_bytes = topic.encode("utf-8")
-    
     if legacy:
         # Legacy wire format as multipart: [topic, pickle_bytes]
         data_bytes = pickle.dumps(data)
         return [topic_bytes, data_bytes]
 
-    buffers = []
+    frames = _array_frames(topic_bytes, data)
+    if frames is not None:
+        return frames
+
+    if use_msgpack:
+        frames = _msgpack_frames(topic_bytes, data)
+        if frames is not None:
+            return frames
+
     # Protocol 5 allows us to extract buffers to avoid copying data into the pickle stream
-    main_stream = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
+    if "torch" in sys.modules:
+        # torch pickles tensor storage in-band; route CPU tensors through numpy instead.
+        main_stream, buffers = _tensor_pickle(data)
+    else:
+        buffers = []
+        main_stream = pickle.dumps(data, protocol=5, buffer_callback=buffers.append)
     
     # Wire format: [topic, main_pickle_stream, buffer1, buffer2...]
-    frames = [topic_bytes, main_stream] + buffers
+    frames = [topic_bytes, main_stream]
+    frames.extend(_raw_buffer(buffer) for buffer in buffers)
     return frames
 
 
-def deserialize(frames: List[bytes]) -> Tuple[str, Any]:
+def _raw_buffer(buffer: pickle.PickleBuffer) -> Union[memoryview, bytes]:
+    """
+    Flat byte view of an out-of-band buffer, ready to be sent as a frame without copying.
+    Non-contiguous buffers cannot be sent as-is and are copied into C order instead.
+    """
+    try:
+        return buffer.raw()
+    except BufferError:
+        return memoryview(buffer).tobytes()
+
+
+def _reduce_tensor(obj: Any) -> Tuple[Any, ...]:
+    """
+    Reduce a torch tensor to a numpy array, so its data goes out-of-band like any other
+    array instead of being copied into the stream. On receive, the tensor aliases the
+    received buffer. Tensors on other devices are copied to the CPU once and moved back
+    to their device on receive. Tensors numpy cannot represent are pickled by torch.
+    """
+    torch = sys.modules["torch"]
+    if obj.requires_grad or obj.layout is not torch.strided:
+        return obj.__reduce_ex__(5)
+    device = obj.device
+    try:
+        if device.type == "cpu":
+            return _tensor_from_array, (obj.numpy(),)
+        return _tensor_from_array, (obj.cpu().numpy(), str(device))
+    except (TypeError, RuntimeError):
+        # dtypes without a numpy equivalent (e.g. bfloat16), conj/neg views, no numpy, ...
+        return obj.__reduce_ex__(5)
+
+
+# Built once torch is imported. A dispatch_table is only consulted (from C) for objects the
+# pickler has no built-in support for, so payloads without tensors pickle at pickle.dumps speed.
+# The ChainMap keeps later copyreg registrations visible.
+_tensor_dispatch_table: Optional[ChainMap] = None
+
+# Idle picklers for _tensor_pickle, per thread; reusing them skips the Pickler/BytesIO setup,
+# which costs more than pickling a small payload. A pickler in use is taken out of the pool,
+# so a reentrant call (e.g. from a __reduce__) builds its own.
+_picklers = threading.local()
+
+
+def _tensor_pickle(data: Any) -> Tuple[bytes, List[pickle.PickleBuffer]]:
+    """
+    Pickle data with torch tensors reduced by _reduce_tensor, returning the main stream
+    and the out-of-band buffers.
+    """
+    global _tensor_dispatch_table
+    pool = getattr(_picklers, "pool", None)
+    if pool is None:
+        pool = _picklers.pool = []
+    if pool:
+        pickler, stream, buffers = pool.pop()
+    else:
+        if _tensor_dispatch_table is None:
+            _tensor_dispatch_table = ChainMap({sys.modules["torch"].Tensor: _reduce_tensor}, copyreg.dispatch_table)
+        stream = io.BytesIO()
+        buffers = []
+        pickler = pickle.Pickler(stream, protocol=5, buffer_callback=buffers.append)
+        pickler.dispatch_table = _tensor_dispatch_table
+    try:
+        pickler.dump(data)
+        return stream.getvalue(), buffers[:]
+    finally:
+        pickler.clear_memo()
+        stream.seek(0)
+        stream.truncate()
+        buffers.clear()
+        pool.append((pickler, stream, buffers))
+
+
+def _array_frames(topic_bytes: bytes, data: Any) -> Optional[List[Any]]:
+    """
+    Build the tagged wire format for a bare numpy array or torch tensor.
+    Returns None if data is not eligible, in which case it goes through pickle.
+    """
+    parts = _array_parts(data)
+    if parts is None:
+        return None
+    return [topic_bytes, *parts]
+
+
+def _array_parts(data: Any) -> Optional[Tuple[bytes, Any]]:
+    """
+    Header and flat uint8 data view for a numpy array or torch tensor that can be sent raw.
+    Returns None if data is not eligible.
+    """
+    # Only look at numpy/torch if the caller already imported them.
+    np = sys.modules.get("numpy")
+    if np is None:
+        return None
+
+    if type(data) is np.ndarray:
+        tag = _NDARR_TAG
+        array = data
+    else:
+        torch = sys.modules.get("torch")
+        if torch is None or type(data) is not torch.Tensor:
+            return None
+        if data.device.type != "cpu" or data.requires_grad or not data.is_contiguous():
+            return None
+        try:
+            array = data.numpy()
+        except (TypeError, RuntimeError):
+            # dtypes without a numpy equivalent (e.g. bfloat16), conj/neg views, ...
+            return None
+        tag = _TORCH_TAG
+
+    dtype = array.dtype
+    if not array.flags.c_contiguous or dtype.hasobject or dtype.fields is not None:
+        return None
+
+    dtype_bytes = dtype.str.encode("ascii")
+    header = (
+        _HEADER_PREFIX.pack(tag, len(dtype_bytes), array.ndim)
+        + dtype_bytes
+        + _shape_struct(array.ndim).pack(*array.shape)
+    )
+    return header, array.reshape(-1).view(np.uint8)
+
+
+def _msgpack_frames(topic_bytes: bytes, data: Any) -> Optional[List[Any]]:
+    """
+    Build the msgpack wire format, with arrays/tensors sent as out-of-band frames.
+    Returns None if msgpack cannot represent data exactly, in which case it goes through pickle.
+    """
+    import msgpack
+
+    if _has_non_bytes_binary(data):
+        return None
+    buffers = []
+
+    def default(obj):
+        parts = _array_parts(obj)
+        if parts is None:
+            raise TypeError(f"can not serialize {type(obj).__name__!r} object")
+        header, array_data = parts
+        buffers.append(array_data)
+        return msgpack.ExtType(_MSGPACK_ARRAY_EXT, header)
+
+    try:
+        # strict_types rejects tuples and subclasses instead of silently packing them as
+        # lists/base types, so they fall back to pickle and round-trip unchanged.
+        packed = msgpack.packb(data, default=default, use_bin_type=True, strict_types=True)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return [topic_bytes, _MSGPACK_TAG, packed, *buffers]
+
+
+def _has_non_bytes_binary(data: Any) -> bool:
+    """
+    Whether data holds a bytearray or memoryview. msgpack packs them as bin even with
+    strict_types, without calling default, so they would come back as bytes.
+    """
+    stack = [data]
+    # Containers already walked, so shared and cyclic ones are visited once.
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        cls = type(obj)
+        if cls is dict or cls is list:
+            if id(obj) in seen:
+                continue
+            seen.add(id(obj))
+            if cls is dict:
+                stack.extend(obj.keys())
+                stack.extend(obj.values())
+            else:
+                stack.extend(obj)
+        elif cls is bytearray or cls is memoryview:
+            return True
+    return False
+
+
+def _shape_struct(ndim: int) -> struct.Struct:
+    """
+    Prebuilt packer for an ndim-long shape header, so the format is parsed once per ndim.
+    """
+    packer = _SHAPE_STRUCTS.get(ndim)
+    if packer is None:
+        packer = _SHAPE_STRUCTS[ndim] = struct.Struct(f"<{ndim}q")
+    return packer
+
+
+def _is_array_header(frame: Any) -> bool:
+    """
+    Whether frame 1 of a three-frame message is an array header rather than a pickle stream.
+    """
+    return len(frame) >= _HEADER_PREFIX.size and memoryview(frame)[0] == 0
+
+
+def _parse_header(header: bytes) -> Tuple[bytes, Any, Tuple[int, ...]]:
+    """
+    Split an array header into its tag, numpy dtype and shape.
+    """
+    import numpy as np
+
+    tag, dtype_len, ndim = _HEADER_PREFIX.unpack_from(header)
+    offset = _HEADER_PREFIX.size
+    dtype = np.dtype(str(header[offset:offset + dtype_len], "ascii"))
+    shape = _shape_struct(ndim).unpack_from(header, offset + dtype_len)
+    return tag, dtype, shape
+
+
+def _decode_array(header: bytes, data: Any) -> Any:
+    """
+    Rebuild the array or tensor described by header on top of the data buffer.
+    """
+    import numpy as np
+
+    tag, dtype, shape = _parse_header(header)
+    array = np.frombuffer(data, dtype=dtype).reshape(shape)
+    if tag == _NDARR_TAG:
+        return array
+    if tag == _TORCH_TAG:
+        return _tensor_from_array(array)
+    raise ValueError(f"unknown array tag {tag!r}")
+
+
+def _msgpack_loads(frames: Sequence[Any]) -> Any:
+    import msgpack
+
+    buffers = iter(frames[3:])
+
+    def ext_hook(code, data):
+        if code != _MSGPACK_ARRAY_EXT:
+            return msgpack.ExtType(code, data)
+        return _decode_array(data, next(buffers))
+
+    return msgpack.unpackb(frames[2], ext_hook=ext_hook, raw=False, strict_map_key=False)
+
+
+def _tensor_from_array(array: Any, device: Optional[str] = None) -> Any:
+    import torch
+
+    if not array.flags.writeable:
+        # Tensors are expected to be writable (as they are after unpickling).
+        array = array.copy()
+    tensor = torch.from_numpy(array)
+    if device is not None:
+        tensor = tensor.to(device)
+    return tensor
+
+
+def _as_bytes(frame: Any) -> bytes:
+    if type(frame) is bytes:
+        return frame
+    try:
+        # zmq.Frame.bytes is much cheaper than going through the buffer protocol
+        return frame.bytes
+    except AttributeError:
+        return bytes(frame)
+
+
+def array_decoder(frames: Sequence[Union[bytes, "zmq.Frame"]]) -> Optional[Callable[[Sequence[Any]], Any]]:
+    """
+    If frames carry a bare array/tensor, return a decoder specialized to its dtype and shape.
+    The decoder rebuilds later messages with the same layout without re-parsing the header,
+    and returns None for any message with a different layout.
+    Returns None if frames do not carry a bare array.
+    """
+    if len(frames) != 3 or not _is_array_header(frames[1]):
+        return None
+    header = _as_bytes(frames[1])
+    tag, dtype, shape = _parse_header(header)
+    if tag != _NDARR_TAG and tag != _TORCH_TAG:
+        return None
+
+    import numpy as np
+
+    nbytes = len(frames[2])
+    frombuffer = np.frombuffer
+    is_tensor = tag == _TORCH_TAG
+
+    def decode(frames: Sequence[Any]) -> Any:
+        if len(frames) != 3 or len(frames[2]) != nbytes or _as_bytes(frames[1]) != header:
+            return None
+        array = frombuffer(frames[2], dtype=dtype).reshape(shape)
+        return _tensor_from_array(array) if is_tensor else array
+
+    return decode
+
+
+def peek_topic(frames: Sequence[Union[bytes, "zmq.Frame"]]) -> bytes:
+    """
+    Return the encoded topic of a message without deserializing its payload.
+    """
+    if len(frames) == 1:
+        # Single-frame legacy: "topic data"
+        view = memoryview(frames[0])
+        return bytes(view[:_topic_end(view)])
+    return bytes(frames[0])
+
+
+def _topic_end(view: memoryview) -> int:
+    """
+    Index of the space separating topic and payload in a single-frame legacy message.
+    Topics are short, so only the head of the message is copied for the search.
+    """
+    idx = bytes(view[:_TOPIC_SCAN_BYTES]).find(b" ")
+    if idx < 0:
+        idx = bytes(view).find(b" ")
+        if idx < 0:
+            raise ValueError("single-frame message has no topic separator")
+    return idx
+
+
+def deserialize(frames: Sequence[Union[bytes, "zmq.Frame"]]) -> Tuple[str, Any]:
     """
     Deserialize data from the wire format.
+    Frames may be bytes or zmq.Frame objects (from recv_multipart(copy=False));
+    out-of-band buffers are then used in place without copying.
     Handles:
     1. Single-frame legacy: "topic data" (concatenated bytes)
     2. Multi-frame legacy: [topic, pickle_bytes]
     3. Multi-frame default: [topic, main_stream, *buffers]
+    4. Multi-frame array: [topic, header, data]
+    5. Multi-frame msgpack: [topic, tag, packed, *array_data]
     """
+    n_frames = len(frames)
+
     # 1. Single-frame legacy (backward compatibility for old external publishers)
-    if len(frames) == 1:
-        msg = frames[0]
-        topic_str, data_bytes = msg.split(b" ", 1)
-        topic = topic_str.decode("utf-8")
-        data = pickle.loads(data_bytes)
+    if n_frames == 1:
+        # Slice a view instead of splitting, so the payload is not copied.
+        view = memoryview(frames[0])
+        idx = _topic_end(view)
+        topic = str(view[:idx], "utf-8")
+        data = pickle.loads(view[idx + 1:])
         return topic, data
 
     # Multi-frame (Legacy or Unified)
     # Frame 0: Topic
-    topic = frames[0].decode("utf-8")
-    
-    # Frame 1: Main pickle stream (or simple pickle bytes for legacy)
-    main_stream = frames[1]
-    
+    topic = str(frames[0], "utf-8")
+
+    # Frame 1: Main pickle stream (or simple pickle bytes for legacy).
+    # Most small messages have no out-of-band buffers; skip the buffers argument for them.
+    if n_frames == 2:
+        return topic, pickle.loads(frames[1])
+
+    if n_frames == 3 and _is_array_header(frames[1]):
+        return topic, _decode_array(_as_bytes(frames[1]), frames[2])
+
+    # Only tag-length frames can be the msgpack tag; a pickle stream never starts with a null byte.
+    if len(frames[1]) == _TAG_LEN and _as_bytes(frames[1]) == _MSGPACK_TAG:
+        return topic, _msgpack_loads(frames)
+
     # Frames 2+: Out-of-band buffers (only for default protocol 5)
-    buffers = frames[2:]
-    
-    data = pickle.loads(main_stream, buffers=buffers)
+    data = pickle.loads(frames[1], buffers=frames[2:])
     return topic, data
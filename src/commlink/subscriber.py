@@ -1,8 +1,20 @@
-from typing import Iterable, Optional, Any
+from collections import deque
+from typing import Callable, Iterable, Optional, Any
+import itertools
+import threading
 import warnings
+import weakref
 import zmq
 
-from commlink.serializer import deserialize
+from commlink import _context, _transport
+from commlink.serializer import array_decoder, deserialize, peek_topic
+
+# Maximum number of messages the receive thread drains before handing them to get().
+_MAX_DRAIN_BATCH = 256
+
+# Numbers the wake sockets' inproc endpoints. Not id(self): a collected subscriber's id can be
+# reused before libzmq has released its endpoint name.
+_wake_ids = itertools.count()
 
 class Subscriber:
     def __init__(
@@ -11,29 +23,54 @@ class Subscriber:
         port: int = 5000,
         topics: Optional[Iterable[str]] = [],
         buffer: bool = False,
+        rcvhwm: int = 100,
+        rcvbuf: int = 8 * 1024 * 1024,
+        ipc: Optional[bool] = None,
     ):
         """
-        host: host to connect to
+        host: host to connect to, or a full ZMQ endpoint (e.g. "ipc:///tmp/cam.sock"),
+            in which case port and ipc are ignored
         port: port to connect to
         topics: optional list of topics to subscribe to.
             If not supplied, subscribe to all topics.
+            Topics match exactly: "robot" does not receive "robot/arm" (unlike ZMQ prefix subscriptions,
+            which older versions used). Subscribe to each full topic, or to all topics and filter the
+            topic returned by get().
         buffer: whether to keep old messages in the buffer (no conflation).
             Default False (only keep latest for each topic).
             If False, it also maintains a cache of the last received message.
             This means get() will return the last known value if no new data is available.
+        rcvhwm: maximum number of messages queued on the socket before new ones are dropped.
+            With buffer=True, it also bounds each topic's queue (the oldest messages are dropped).
+        rcvbuf: kernel receive buffer size in bytes.
+        ipc: connect over the publisher's unix domain socket instead of TCP.
+            None (default) uses it when host is local and the publisher is already listening on it;
+            True forces it, False always uses TCP.
+
+        A single socket receives every message; a background thread dispatches
+        the raw frames into per-topic queues, and get() deserializes on demand.
         """
         self.buffer = buffer
-        self.context = zmq.Context()
-        self._endpoint = f"tcp://{host}:{port}"
-        self._topic_sockets: dict[Optional[str], zmq.Socket] = {}
+        self._rcvhwm = rcvhwm
+        self._rcvbuf = rcvbuf
+        self.context = _context.shared_context()
+        if _transport.want_ipc(host, ipc) and (ipc or _transport.ipc_listening(port)):
+            self._endpoint = _transport.ipc_endpoint(port)
+        else:
+            self._endpoint = _transport.endpoint(host, port)
         self._cache: dict[Optional[str], Any] = {}
+        # Per-topic decoders specialized to the last array layout seen on that topic.
+        self._decoders: dict[str, Optional[Callable]] = {}
 
         if isinstance(topics, str):
             raise TypeError("topics must be an iterable of strings, not a single string")
         else:
-            topics = list(topics)
+            # Drop duplicates, keeping first-seen order.
+            topics = list(dict.fromkeys(topics))
             if any(not isinstance(t, str) for t in topics):
                 raise TypeError("topics must be an iterable of strings")
+        for topic in topics:
+            self._validate_topic(topic)
         if not topics and not buffer:
             warnings.warn(
                 "Subscribing to all topics with buffer=False keeps only the latest message across all topics."
@@ -42,73 +79,73 @@ class Subscriber:
                 stacklevel=2,
             )
 
+        # The None queue backs get() without a topic and receives every message.
+        maxlen = (rcvhwm or None) if buffer else 1
+        self._queues: dict[Optional[str], deque] = {None: deque(maxlen=maxlen)}
+        self._dispatch: dict[bytes, deque] = {}
+        for topic in topics:
+            self._queues[topic] = self._dispatch[topic.encode("utf-8")] = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        # Set by the receive thread when it exits.
+        self._stopped = threading.Event()
+
         self._global_socket = self._new_socket()
         self._global_socket.setsockopt_string(zmq.SUBSCRIBE, "")
         self._global_socket.connect(self._endpoint)
-        self._topic_sockets[None] = self._global_socket
 
-        for topic in topics:
-            self._topic_sockets[topic] = self._create_topic_socket(topic)
-
-    def get(self, topic: Optional[str] = None) -> Any:
+        # Lets stop() wake the receive thread out of its poll.
+        wake_endpoint = f"inproc://commlink-subscriber-{next(_wake_ids)}"
+        self._wake_rx = self.context.socket(zmq.PAIR)
+        self._wake_rx.bind(wake_endpoint)
+        self._wake_tx = self.context.socket(zmq.PAIR)
+        self._wake_tx.connect(wake_endpoint)
+
+        # The thread must not reference self, so an unstopped Subscriber can still be collected;
+        # the finalizer then stops the thread and closes the sockets.
+        self._thread = threading.Thread(
+            target=_recv_loop,
+            args=(self._global_socket, self._wake_rx, self._dispatch, self._queues[None], self._cond, self._stopped),
+            daemon=True,
+        )
+        self._thread.start()
+        self._finalizer = weakref.finalize(self, _shutdown, self._thread, self._wake_tx)
+
+    def get(self, topic: Optional[str] = None, timeout: Optional[float] = None) -> Any:
         """
         Get data for a topic.
-        - sub.get() returns (topic, data) from the global subscriber.
-        - sub.get(topic) returns the deserialized data from that topic's dedicated subscriber.
+        - sub.get() returns (topic, data) for any subscribed message.
+        - sub.get(topic) returns the deserialized data for that topic.
+        timeout: seconds to wait for a message if none is available (None waits forever).
+            Raises TimeoutError if nothing arrives in time.
         """
-        if topic not in self._topic_sockets:
+        if topic not in self._queues:
             raise KeyError(f"Topic '{topic}' was not subscribed.")
 
-        socket = self._topic_sockets[topic]
-
-        # Helper to receive one message
-        def recv_one(flags=0):
-            frames = socket.recv_multipart(flags=flags)
-            return deserialize(frames)
-
-        # If not buffering, we want the LATEST message (conflation) AND we persist the last value.
-        # Since ZMQ_CONFLATE doesn't support multipart, we manually drain the queue.
-        if not self.buffer:
-            # Try to read all pending messages
-            last_msg = None
-            while True:
-                try:
-                    last_msg = recv_one(flags=zmq.NOBLOCK)
-                except zmq.Again:
-                    break
-            
-            if last_msg is not None:
-                topic_str, data_obj = last_msg
-                if topic is None:
-                    self._cache[None] = (topic_str, data_obj)
-                else:
-                    self._cache[topic] = data_obj
-                return (topic_str, data_obj) if topic is None else data_obj
-            
-            # If we drained nothing (queue was empty start), return cached value if exists
-            if topic in self._cache:
-                return self._cache[topic]
-            elif topic is None and None in self._cache:
-                return self._cache[None]
-            
-            # If no new data and no cache, fall through to blocking wait?
-            # User said "persist=True when buffer=False".
-            # Usually persist implies "if I have nothing, give me last".
-            # If I have NOTHING (start up), I must wait for something.
-            # So falling through to blocking receive is correct.
-
-        # Blocking receive (fallback or default behavior for buffer=True)
-        # Also reached if buffer=False but no cache and no new data.
-        topic_str, data_obj = recv_one()
-        
-        # If we are in non-buffered mode, we update cache even on blocking receive
+        queue = self._queues[topic]
+        with self._cond:
+            if not queue:
+                # If not buffering, we persist the last value and return it when nothing new arrived.
+                if not self.buffer and topic in self._cache:
+                    return self._cache[topic]
+                # Nothing received yet: wait for the first message.
+                if not self._cond.wait_for(lambda: queue or self._stopped.is_set(), timeout):
+                    raise TimeoutError(f"No message received for topic '{topic}' within {timeout}s.")
+                if not queue:
+                    raise RuntimeError("Subscriber has been stopped.")
+            frames = queue.popleft()
+
+        if topic is not None:
+            # Topics usually carry the same array layout every time; reuse the parsed header.
+            decoder = self._decoders.get(topic)
+            result = decoder(frames) if decoder is not None else None
+            if result is None:
+                _, result = deserialize(frames)
+                self._decoders[topic] = array_decoder(frames)
+        else:
+            result = deserialize(frames)
         if not self.buffer:
-            if topic is None:
-                self._cache[None] = (topic_str, data_obj)
-            else:
-                self._cache[topic] = data_obj
-
-        return (topic_str, data_obj) if topic is None else data_obj
+            self._cache[topic] = result
+        return result
 
     def __getitem__(self, topic: str) -> Any:
         """
@@ -119,20 +156,16 @@ class Subscriber:
     def stop(self):
         """
         Safely terminate the subscription and clean up the resources.
+        The shared context is left running and is torn down at interpreter exit.
+        A Subscriber that is garbage collected without stop() is stopped the same way.
         """
-        for socket in self._topic_sockets.values():
-            socket.close()
-        self.context.term()
+        self._finalizer()
 
     def _new_socket(self) -> zmq.Socket:
         socket = self.context.socket(zmq.SUB)
-        return socket
-
-    def _create_topic_socket(self, topic: str) -> zmq.Socket:
-        self._validate_topic(topic)
-        socket = self._new_socket()
-        socket.setsockopt_string(zmq.SUBSCRIBE, topic)
-        socket.connect(self._endpoint)
+        socket.setsockopt(zmq.RCVHWM, self._rcvhwm)
+        socket.setsockopt(zmq.RCVBUF, self._rcvbuf)
+        socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
         return socket
 
     def _validate_topic(self, topic: str):
@@ -141,6 +174,57 @@ class Subscriber:
 
 
 
+def _recv_loop(socket, wake_rx, dispatch, global_queue, cond, stopped):
+    """
+    Receive messages and dispatch the raw frames to the per-topic queues.
+    Runs on a background thread, which owns both sockets and closes them when woken by wake_rx.
+    """
+    poller = zmq.Poller()
+    poller.register(socket, zmq.POLLIN)
+    poller.register(wake_rx, zmq.POLLIN)
+    # Reused across wakeups; it only holds references until they are moved to the queues.
+    batch = []
+    try:
+        while True:
+            if any(sock is wake_rx for sock, _ in poller.poll()):
+                break
+            # Drain whatever is queued, then publish the batch under one lock/notify.
+            for _ in range(_MAX_DRAIN_BATCH):
+                try:
+                    frames = socket.recv_multipart(flags=zmq.NOBLOCK, copy=False)
+                except zmq.Again:
+                    break
+                try:
+                    topic = peek_topic(frames)
+                except ValueError:
+                    # Malformed message (e.g. single frame without a topic); drop it.
+                    continue
+                batch.append((dispatch.get(topic), frames))
+            with cond:
+                for queue, frames in batch:
+                    global_queue.append(frames)
+                    if queue is not None:
+                        queue.append(frames)
+                cond.notify_all()
+            batch.clear()
+    finally:
+        socket.close()
+        wake_rx.close()
+        with cond:
+            stopped.set()
+            cond.notify_all()
+
+
+def _shutdown(thread: threading.Thread, wake_tx: zmq.Socket):
+    """
+    Wake the receive thread, wait for it to close its sockets, then close the wake socket.
+    """
+    wake_tx.send(b"")
+    if thread is not threading.current_thread():
+        thread.join()
+    wake_tx.close()
+
+
 if __name__ == "__main__":
     # Example usage:
     import cv2
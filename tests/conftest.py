@@ -0,0 +1,24 @@
+import os
+import socket
+import tempfile
+import uuid
+
+import zmq
+
+
+def get_free_port() -> int:
+    """
+    Ask the OS for an unused TCP port, so tests (and pytest-xdist workers) never share one.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_endpoint() -> str:
+    """
+    A fresh endpoint for one test: a unix domain socket where supported, else a free TCP port.
+    """
+    if zmq.has("ipc"):
+        return f"ipc://{os.path.join(tempfile.gettempdir(), f'commlink-test-{uuid.uuid4().hex}.sock')}"
+    return f"tcp://127.0.0.1:{get_free_port()}"
@@ -1,30 +1,21 @@
-import socket
+import gc
+import threading
 import time
 
+import numpy as np
 import pytest
 import zmq
 
 from commlink.publisher import Publisher
 from commlink.subscriber import Subscriber
-
-
-def get_free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        return sock.getsockname()[1]
-
-
-def set_receive_timeouts(subscriber: Subscriber, timeout_ms: int = 1000) -> None:
-    subscriber._global_socket.setsockopt(zmq.RCVTIMEO, timeout_ms)
-    for socket in subscriber._topic_sockets.values():
-        socket.setsockopt(zmq.RCVTIMEO, timeout_ms)
+from commlink.serializer import serialize
+from conftest import get_free_port, make_endpoint
 
 
 def test_multi_topic_specific_sockets_keep_latest_message():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["alpha", "beta"], buffer=False)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher.publish("alpha", "first-alpha")
@@ -33,10 +24,10 @@ def test_multi_topic_specific_sockets_keep_latest_message():
     publisher.publish("beta", "second-beta")
     time.sleep(0.05)
 
-    data_a = subscriber.get("alpha")
+    data_a = subscriber.get("alpha", timeout=1)
     assert data_a == "second-alpha"
 
-    data_b = subscriber.get("beta")
+    data_b = subscriber.get("beta", timeout=1)
     assert data_b == "second-beta"
 
     subscriber.stop()
@@ -46,7 +37,6 @@ def test_global_get_receives_messages_from_all_topics():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["one", "two"], buffer=True)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher.publish("one", 1)
@@ -54,7 +44,7 @@ def test_global_get_receives_messages_from_all_topics():
 
     received_topics = []
     for _ in range(2):
-        topic, data = subscriber.get()
+        topic, data = subscriber.get(timeout=1)
         received_topics.append(topic)
         assert data in (1, 2)
 
@@ -67,7 +57,6 @@ def test_getitem_reads_specific_topic_socket():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["red", "blue"], buffer=False)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher.publish("blue", "other")
@@ -85,7 +74,6 @@ def test_setitem_publishes():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["alpha"], buffer=False)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher["alpha"] = "published via setitem"
@@ -100,7 +88,6 @@ def test_get_raises_for_unsubscribed_topic():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["alpha"], buffer=False)
-    set_receive_timeouts(subscriber)
     time.sleep(0.05)
 
     with pytest.raises(KeyError):
@@ -108,7 +95,7 @@ def test_get_raises_for_unsubscribed_topic():
 
     publisher.publish("alpha", "value")
     time.sleep(0.05)
-    assert subscriber.get("alpha") == "value"
+    assert subscriber.get("alpha", timeout=1) == "value"
 
     subscriber.stop()
 
@@ -117,37 +104,71 @@ def test_global_subscription_with_empty_topics_list():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=[], buffer=True)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher.publish("x", "first")
     publisher.publish("y", "second")
 
-    received = {subscriber.get()[0], subscriber.get()[0]}
+    received = {subscriber.get(timeout=1)[0], subscriber.get(timeout=1)[0]}
     assert received == {"x", "y"}
 
     subscriber.stop()
 
 
+def test_msgpack_publisher_round_trips():
+    pytest.importorskip("msgpack")
+    port = get_free_port()
+    publisher = Publisher("*", port=port, msgpack_serializer=True)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["state"])
+
+    time.sleep(0.05)
+    publisher.publish("state", {"step": 1, "pose": [0.0, 1.0, 2.0]})
+    assert subscriber.get("state", timeout=1) == {"step": 1, "pose": [0.0, 1.0, 2.0]}
+
+    subscriber.stop()
+
+
+def test_explicit_endpoint_is_used_as_given():
+    endpoint = make_endpoint()
+    publisher = Publisher(endpoint)
+    subscriber = Subscriber(endpoint, topics=["alpha"])
+    assert subscriber._endpoint == endpoint
+
+    time.sleep(0.05)
+    publisher.publish("alpha", "value")
+    assert subscriber.get("alpha", timeout=1) == "value"
+
+    subscriber.stop()
+    publisher.stop()
+
+
 def test_topic_validation_rejects_spaces():
     port = get_free_port()
     with pytest.raises(ValueError):
         Subscriber("127.0.0.1", port=port, topics=["bad topic"], buffer=True)
 
 
+def test_publish_rejects_spaces_in_topic():
+    port = get_free_port()
+    publisher = Publisher("*", port=port)
+    publisher.publish("ok", 1)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            publisher.publish("bad topic", 1)
+
+
 def test_buffer_true_preserves_order_on_topic_socket():
     port = get_free_port()
     publisher = Publisher("*", port=port)
     subscriber = Subscriber("127.0.0.1", port=port, topics=["seq"], buffer=True)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher.publish("seq", 1)
     publisher.publish("seq", 2)
     time.sleep(0.05)
 
-    first = subscriber.get("seq")
-    second = subscriber.get("seq")
+    first = subscriber.get("seq", timeout=1)
+    second = subscriber.get("seq", timeout=1)
     assert first == 1
     assert second == 2
 
@@ -172,7 +193,6 @@ def test_buffer_false_implies_persistence():
     publisher = Publisher("*", port=port)
     # Persistence is now automatic when buffer=False
     subscriber = Subscriber("127.0.0.1", port=port, topics=["p1"], buffer=False)
-    set_receive_timeouts(subscriber)
 
     time.sleep(0.05)
     publisher["p1"] = "persisted"
@@ -185,3 +205,122 @@ def test_buffer_false_implies_persistence():
     assert subscriber["p1"] == "persisted"
 
     subscriber.stop()
+
+
+def test_track_sends_delivers_large_buffers():
+    port = get_free_port()
+    publisher = Publisher("*", port=port, track_sends=True)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["big"], buffer=False)
+
+    time.sleep(0.05)
+    payload = bytearray(b"x" * (1 << 20))
+    publisher["big"] = payload
+    time.sleep(0.05)
+
+    assert subscriber["big"] == payload
+
+    subscriber.stop()
+
+
+def test_cache_payloads_resends_frames_for_the_same_object():
+    port = get_free_port()
+    publisher = Publisher("*", port=port, cache_payloads=True)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["state"], buffer=True)
+
+    time.sleep(0.05)
+    state = {"step": 1}
+    publisher.publish("state", state)
+    # Cached frames are reused, so in-place changes are not picked up...
+    state["step"] = 2
+    publisher.publish("state", state)
+    # ...but a different object is serialized afresh.
+    publisher.publish("state", {"step": 3})
+
+    assert [subscriber.get("state", timeout=1)["step"] for _ in range(3)] == [1, 1, 3]
+
+    subscriber.stop()
+
+
+def test_default_publish_lets_callers_reuse_buffers():
+    port = get_free_port()
+    publisher = Publisher("*", port=port, ipc=False)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["img"], buffer=True, ipc=False)
+
+    time.sleep(0.05)
+    buf = np.zeros((720, 1280, 3), dtype=np.uint8)
+    for fill in range(20):
+        buf[:] = fill
+        publisher.publish("img", buf if fill % 2 else {"img": buf})
+
+    for fill in range(20):
+        received = subscriber.get("img", timeout=1)
+        assert (received if fill % 2 else received["img"]).min() == fill
+        assert (received if fill % 2 else received["img"]).max() == fill
+
+    subscriber.stop()
+
+
+def test_get_times_out_without_messages():
+    port = get_free_port()
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["quiet"], buffer=True)
+
+    with pytest.raises(TimeoutError):
+        subscriber.get("quiet", timeout=0.05)
+
+    subscriber.stop()
+
+
+def test_topic_dispatch_is_exact_not_prefix():
+    port = get_free_port()
+    publisher = Publisher("*", port=port)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["cam", "cam_depth"], buffer=True)
+
+    time.sleep(0.05)
+    publisher.publish("cam_depth", "depth")
+    publisher.publish("cam", "rgb")
+
+    assert subscriber.get("cam", timeout=1) == "rgb"
+    assert subscriber.get("cam_depth", timeout=1) == "depth"
+
+    subscriber.stop()
+
+
+def test_local_subscriber_connects_over_ipc():
+    port = get_free_port()
+    publisher = Publisher("*", port=port)
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["local"], buffer=True)
+    assert subscriber._endpoint.startswith("ipc://")
+
+    time.sleep(0.05)
+    publisher.publish("local", "over ipc")
+    assert subscriber.get("local", timeout=1) == "over ipc"
+
+    subscriber.stop()
+    publisher.stop()
+
+
+def test_malformed_message_does_not_stop_the_subscriber():
+    port = get_free_port()
+    context = zmq.Context.instance()
+    raw = context.socket(zmq.PUB)
+    raw.bind(f"tcp://127.0.0.1:{port}")
+    subscriber = Subscriber("127.0.0.1", port=port, topics=["ok"], buffer=True, ipc=False)
+
+    time.sleep(0.05)
+    raw.send(b"no-topic-separator")
+    raw.send_multipart(serialize("ok", 1))
+    assert subscriber.get("ok", timeout=1) == 1
+
+    subscriber.stop()
+    raw.close()
+
+
+def test_unstopped_subscriber_is_cleaned_up_when_collected():
+    port = get_free_port()
+    before = threading.active_count()
+    subscribers = [Subscriber("127.0.0.1", port=port, topics=["x"]) for _ in range(5)]
+    assert threading.active_count() == before + 5
+
+    del subscribers
+    gc.collect()
+    assert threading.active_count() == before
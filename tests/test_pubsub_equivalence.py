@@ -1,15 +1,22 @@
 
+from collections import deque
+
 import pytest
 import numpy as np
 import torch
 import time
-import queue
-import threading
 from commlink.publisher import Publisher
 from commlink.subscriber import Subscriber
+from commlink.serializer import serialize, deserialize
+from conftest import make_endpoint
 
 # Define payloads to test
 def get_payloads():
+    """
+    Build the payloads from fixed seeds, so every run sends the same data.
+    """
+    rng = np.random.default_rng(0)
+    torch.manual_seed(0)
     payloads = []
     
     # 1. Simple primitives
@@ -21,7 +28,7 @@ def get_payloads():
     
     # 2. Numpy Arrays
     payloads.append(("numpy_1d", np.array([1, 2, 3], dtype=np.float32)))
-    payloads.append(("numpy_2d", np.random.rand(10, 10)))
+    payloads.append(("numpy_2d", rng.random((10, 10))))
     payloads.append(("numpy_large", np.zeros((100, 100, 3), dtype=np.uint8)))
     
     # 3. Torch Tensors
@@ -32,7 +39,7 @@ def get_payloads():
     payloads.append(("nested_dict", {
         "meta": "data",
         "counts": [1, 2, 3],
-        "image": np.random.randint(0, 255, (32, 32, 3), dtype=np.uint8),
+        "image": rng.integers(0, 255, (32, 32, 3), dtype=np.uint8),
         "embedding": torch.randn(128)
     }))
     
@@ -44,82 +51,140 @@ def get_payloads():
     
     return payloads
 
+# Built once at import and shared by parametrize and the fixture.
+_PAYLOADS = get_payloads()
+
+def assert_same_bytes(a, b):
+    """
+    Exact round-trip check for arrays: same shape, dtype and raw bytes.
+    Comparing uint8 views is a plain memory compare, much cheaper than an elementwise check.
+    """
+    assert a.shape == b.shape
+    assert a.dtype == b.dtype
+    a_bytes = np.ascontiguousarray(a).reshape(-1).view(np.uint8)
+    b_bytes = np.ascontiguousarray(b).reshape(-1).view(np.uint8)
+    assert np.array_equal(a_bytes, b_bytes)
+
 def assert_data_equal(a, b):
     """
-    Recursive equality check that handles numpy arrays and torch tensors.
+    Equality check through nested dicts/lists/tuples that handles numpy arrays and torch tensors.
+    Walks the containers with an explicit stack rather than recursing.
     """
-    if isinstance(a, (np.ndarray, np.generic)):
-        assert isinstance(b, (np.ndarray, np.generic))
-        np.testing.assert_array_equal(a, b)
-    elif torch.is_tensor(a):
-        assert torch.is_tensor(b)
-        assert torch.equal(a, b)
-    elif isinstance(a, dict):
-        assert isinstance(b, dict)
-        assert a.keys() == b.keys()
-        for k in a:
-            assert_data_equal(a[k], b[k])
-    elif isinstance(a, (list, tuple)):
-        assert isinstance(b, (list, tuple))
-        assert len(a) == len(b)
-        for i in range(len(a)):
-            assert_data_equal(a[i], b[i])
-    else:
-        assert a == b
+    stack = deque([(a, b)])
+    while stack:
+        a, b = stack.pop()
+        if isinstance(a, (np.ndarray, np.generic)):
+            assert isinstance(b, (np.ndarray, np.generic))
+            if isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and not a.dtype.hasobject:
+                assert_same_bytes(a, b)
+            else:
+                np.testing.assert_array_equal(a, b)
+        elif torch.is_tensor(a):
+            assert torch.is_tensor(b)
+            assert a.dtype == b.dtype
+            try:
+                a_array, b_array = a.numpy(force=True), b.numpy(force=True)
+            except TypeError:
+                # dtypes without a numpy equivalent (e.g. bfloat16)
+                assert torch.equal(a, b)
+            else:
+                assert_same_bytes(a_array, b_array)
+        elif isinstance(a, dict):
+            assert isinstance(b, dict)
+            assert a.keys() == b.keys()
+            # Reversed so items are checked in order.
+            stack.extend((a[k], b[k]) for k in reversed(list(a)))
+        elif isinstance(a, (list, tuple)):
+            assert isinstance(b, (list, tuple))
+            assert len(a) == len(b)
+            stack.extend(zip(reversed(a), reversed(b)))
+        else:
+            assert a == b
 
-def run_pubsub_exchange(port, fast_mode, topic, payload):
+def _has_tensor(x):
     """
-    Spin up a publisher and subscriber, send one message, return the received message.
+    Whether x contains a numpy array or torch tensor anywhere in its dicts/lists/tuples.
     """
-    recv_queue = queue.Queue()
-    
-    # Subscriber always auto-detects, so config is same
-    sub = Subscriber("localhost", port=port, topics=[topic], buffer=True)
-    
-    def listener():
+    if isinstance(x, (np.ndarray, torch.Tensor)):
+        return True
+    if isinstance(x, dict):
+        return any(_has_tensor(v) for v in x.values())
+    if isinstance(x, (list, tuple)):
+        return any(_has_tensor(v) for v in x)
+    return False
+
+# One publisher/subscriber pair per serializer, shared by every case in the module.
+MODES = ("legacy", "fast")
+READY_TOPIC = "ready"
+
+def wait_until_connected(pub, sub):
+    """
+    Publish a sentinel until the subscriber sees it, instead of sleeping a fixed amount.
+    PUB drops messages until the SUB connection is up, so keep resending.
+    """
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        pub.publish(READY_TOPIC, True)
         try:
-            # Wait up to 2 seconds
-            t, d = sub.get()
-            recv_queue.put(d)
-        except Exception as e:
-            recv_queue.put(e)
+            sub.get(READY_TOPIC, timeout=0.02)
+            return
+        except TimeoutError:
+            pass
+    pytest.fail("Subscriber did not connect")
 
-    t = threading.Thread(target=listener)
-    t.start()
-    
-    # fast_mode=True means legacy_serializer=False
-    # fast_mode=False means legacy_serializer=True
-    pub = Publisher("localhost", port=port, legacy_serializer=not fast_mode)
-    time.sleep(0.2) # Allow connection
-    
-    pub.publish(topic, payload)
-    
-    t.join(timeout=3)
-    sub.stop()
-    
-    if recv_queue.empty():
-        pytest.fail(f"Did not receive message for {topic} (Fast={fast_mode})")
-        
-    result = recv_queue.get()
-    if isinstance(result, Exception):
-        raise result
-        
-    return result
+@pytest.fixture(scope="module")
+def pubsub_pairs():
+    topics = [READY_TOPIC] + [name for name, _ in _PAYLOADS]
+    pairs = {}
+    for mode in MODES:
+        endpoint = make_endpoint()
+        pub = Publisher(endpoint, legacy_serializer=(mode == "legacy"))
+        sub = Subscriber(endpoint, topics=topics, buffer=True)
+        wait_until_connected(pub, sub)
+        pairs[mode] = (pub, sub)
+    yield pairs
+    for pub, sub in pairs.values():
+        sub.stop()
+        pub.stop()
 
-@pytest.mark.parametrize("name,payload", get_payloads())
-def test_pubsub_equivalence(name, payload):
-    # Unique ports to avoid conflicts during parallel testing (though pytest defaults to output capture not parallel)
-    # We'll use a base port + hash or similar, or just sequential if running single thread.
-    # For safety let's pick a random port or rely on OS to free quickly.
-    # Actually, simpler: define port based on test case hash
-    port_base = 10000 + hash(name) % 5000
-    
-    # 1. Run Legacy
-    legacy_res = run_pubsub_exchange(port_base, False, "test_legacy", payload)
+def exchange_all(pair, payloads):
+    """
+    Publish every payload back-to-back on its own topic, then drain them all.
+    Returns the received data keyed by payload name.
+    """
+    pub, sub = pair
+    for name, payload in payloads:
+        pub.publish(name, payload)
+    received = {}
+    for name, _ in payloads:
+        try:
+            received[name] = sub.get(name, timeout=3)
+        except TimeoutError:
+            pytest.fail(f"Did not receive message for {name}")
+    return received
+
+@pytest.fixture(scope="module")
+def received(pubsub_pairs):
+    # Without arrays/tensors the fast path has no out-of-band buffers to exercise over the wire;
+    # those payloads are checked against the fast serializer in-process instead.
+    return {
+        "legacy": exchange_all(pubsub_pairs["legacy"], _PAYLOADS),
+        "fast": exchange_all(pubsub_pairs["fast"], [(n, p) for n, p in _PAYLOADS if _has_tensor(p)]),
+    }
+
+@pytest.mark.parametrize("name,payload", _PAYLOADS)
+def test_pubsub_equivalence(received, name, payload):
+    # 1. Legacy
+    legacy_res = received["legacy"][name]
     assert_data_equal(payload, legacy_res)
     
-    # 2. Run Fast
-    fast_res = run_pubsub_exchange(port_base + 1, True, "test_fast", payload)
+    # 2. Fast
+    if name in received["fast"]:
+        fast_res = received["fast"][name]
+    else:
+        frames = serialize(name, payload)
+        assert len(frames) == 2
+        _, fast_res = deserialize(frames)
     assert_data_equal(payload, fast_res)
     
     # 3. Explicit Comparison
@@ -127,7 +192,4 @@ def test_pubsub_equivalence(name, payload):
 
 if __name__ == "__main__":
     # Allow running manually
-    for name, payload in get_payloads():
-        print(f"Testing {name}...")
-        test_pubsub_equivalence(name, payload)
-        print("PASS")
+    pytest.main([__file__, "-v"])
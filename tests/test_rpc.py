@@ -1,11 +1,10 @@
-import socket
 import threading
-import time
 
 import pytest
 
 from commlink.rpc_client import RPCClient, RPCException
 from commlink.rpc_server import RPCServer
+from conftest import get_free_port, make_endpoint
 
 
 class ExampleService:
@@ -20,29 +19,22 @@ class ExampleService:
         raise ValueError("boom")
 
 
-def get_free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        return sock.getsockname()[1]
-
-
-def start_server(service: ExampleService, port: int, threaded: bool):
-    server = RPCServer(service, port=port, threaded=threaded)
+def start_server(service: ExampleService, endpoint: str, threaded: bool):
+    server = RPCServer(service, endpoint=endpoint, threaded=threaded)
     if threaded:
         server.start()
         server_thread = server.thread
     else:
         server_thread = threading.Thread(target=server.start, daemon=True)
         server_thread.start()
-    time.sleep(0.05)
     return server, server_thread
 
 
 @pytest.mark.parametrize("threaded", [True, False])
 def test_rpc_server_start_stop(threaded):
-    port = get_free_port()
+    endpoint = make_endpoint()
     service = ExampleService()
-    server, server_thread = start_server(service, port, threaded)
+    server, server_thread = start_server(service, endpoint, threaded)
     try:
         if threaded:
             assert server.thread is not None
@@ -65,11 +57,11 @@ def test_rpc_server_start_stop(threaded):
 
 
 def test_rpc_client_connect():
-    port = get_free_port()
+    endpoint = make_endpoint()
     service = ExampleService()
-    server, server_thread = start_server(service, port, threaded=True)
+    server, server_thread = start_server(service, endpoint, threaded=True)
     try:
-        client = RPCClient("127.0.0.1", port=port)
+        client = RPCClient(endpoint)
         assert "increment" in dir(client)
     finally:
         if server.thread is not None:
@@ -78,10 +70,10 @@ def test_rpc_client_connect():
 
 @pytest.mark.parametrize("threaded", [True, False])
 def test_rpc_server_client_integration(threaded):
-    port = get_free_port()
+    endpoint = make_endpoint()
     service = ExampleService()
-    server, server_thread = start_server(service, port, threaded)
-    client = RPCClient("127.0.0.1", port=port)
+    server, server_thread = start_server(service, endpoint, threaded)
+    client = RPCClient(endpoint)
     try:
         assert client.increment(5) == 5
         assert client.value == 5
@@ -105,3 +97,19 @@ def test_rpc_server_client_integration(threaded):
             if server_thread is not None and server_thread.is_alive():
                 server.stop()
                 server_thread.join(timeout=1)
+
+
+def test_local_rpc_client_connects_over_ipc():
+    port = get_free_port()
+    server = RPCServer(ExampleService(), port=port)
+    server.start()
+    try:
+        client = RPCClient("127.0.0.1", port=port)
+        assert client._endpoint.startswith("ipc://")
+        assert client.increment(2) == 2
+
+        tcp_client = RPCClient("127.0.0.1", port=port, ipc=False)
+        assert tcp_client._endpoint.startswith("tcp://")
+        assert tcp_client.increment(3) == 5
+    finally:
+        server.stop()
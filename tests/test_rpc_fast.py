@@ -1,11 +1,10 @@
-import socket
 import threading
-import time
 import pytest
 import numpy as np
 import torch
 from commlink.rpc_client import RPCClient
 from commlink.rpc_server import RPCServer
+from conftest import make_endpoint
 
 class DataService:
     def __init__(self):
@@ -21,25 +20,19 @@ class DataService:
     def get(self, idx):
         return self.data[idx]
 
-def get_free_port() -> int:
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        return sock.getsockname()[1]
-
-def start_server(service, port):
-    server = RPCServer(service, port=port, threaded=True)
+def start_server(service, endpoint):
+    server = RPCServer(service, endpoint=endpoint, threaded=True)
     server.start()
-    time.sleep(0.05)
     return server
 
 def test_fast_rpc_numpy():
-    port = get_free_port()
+    endpoint = make_endpoint()
     service = DataService()
-    server = start_server(service, port)
+    server = start_server(service, endpoint)
     
     try:
         # Fast Client (default now)
-        client = RPCClient("127.0.0.1", port=port)
+        client = RPCClient(endpoint)
         
         # Test Numpy
         arr = np.random.randn(100, 100)
@@ -56,13 +49,13 @@ def test_fast_rpc_numpy():
         server.stop()
 
 def test_fast_rpc_torch():
-    port = get_free_port()
+    endpoint = make_endpoint()
     service = DataService()
-    server = start_server(service, port)
+    server = start_server(service, endpoint)
     
     try:
         # Fast Client (default now)
-        client = RPCClient("127.0.0.1", port=port)
+        client = RPCClient(endpoint)
         
         # Test Torch
         t = torch.randn(50, 50)
@@ -71,3 +64,36 @@ def test_fast_rpc_torch():
 
     finally:
         server.stop()
+
+class CameraService:
+    def __init__(self):
+        self.buf = np.zeros((720, 1280, 3), dtype=np.uint8)
+        self.frames = 0
+
+    def grab(self):
+        # Refills and returns the same buffer on every call.
+        self.frames += 1
+        self.buf[:] = self.frames % 256
+        return self.buf
+
+def test_reused_reply_buffers_are_not_torn():
+    endpoint = make_endpoint()
+    server = start_server(CameraService(), endpoint)
+    torn = []
+
+    def grab_frames():
+        client = RPCClient(endpoint)
+        for _ in range(30):
+            frame = client.grab()
+            if frame.min() != frame.max():
+                torn.append(frame)
+
+    try:
+        clients = [threading.Thread(target=grab_frames) for _ in range(2)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        assert not torn
+    finally:
+        server.stop()
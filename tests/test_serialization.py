@@ -1,20 +1,31 @@
+import threading
 import pytest
 import numpy as np
 import torch
-from commlink.serializer import serialize, deserialize
+from commlink.serializer import array_decoder, serialize, deserialize
 import pickle
 
-def test_legacy_equivalence():
+# Legacy payload and its expected wire bytes, pickled once; pins the legacy format.
+LEGACY_DATA = {"key": "value", "num": 123}
+LEGACY_PICKLE = pickle.dumps(LEGACY_DATA)
+LEGACY_TOPIC = "test"
+
+@pytest.fixture(scope="module")
+def legacy_frames():
+    """Frames from serialize(..., legacy=True), built once and shared by the legacy tests."""
+    return serialize(LEGACY_TOPIC, LEGACY_DATA, legacy=True)
+
+def test_legacy_equivalence(legacy_frames):
     """Test that legacy serialization works as expected (now returns list of frames)."""
-    data = {"key": "value", "num": 123}
-    topic = "test"
+    data = LEGACY_DATA
+    topic = LEGACY_TOPIC
     
     # Legacy now returns [topic_bytes, pickle_bytes]
-    frames = serialize(topic, data, legacy=True)
+    frames = legacy_frames
     assert isinstance(frames, list)
     assert len(frames) == 2
     assert frames[0] == b"test"
-    assert frames[1] == pickle.dumps(data)
+    assert frames[1] == LEGACY_PICKLE
     
     # Test that we can deserialize this using the unified deserializer
     recovered_topic, recovered_data = deserialize(frames)
@@ -51,16 +62,184 @@ def test_default_equivalence_torch():
     assert recovered_topic == topic
     assert torch.equal(recovered_data['tens'], data['tens'])
 
-def test_unified_deserialization_handles_legacy_frames():
+def test_nested_torch_tensors_go_out_of_band():
+    """CPU tensors inside containers are sent as raw buffers, not pickled in-band."""
+    data = {"tens": torch.randn(64, 64), "meta": [torch.arange(4)]}
+    frames = serialize("test", data)
+    assert len(frames) == 4  # Topic + Pickle + one buffer per tensor
+    assert len(frames[1]) < data["tens"].numel()
+
+    _, recovered = deserialize(frames)
+    assert torch.equal(recovered["tens"], data["tens"])
+    assert torch.equal(recovered["meta"][0], data["meta"][0])
+
+def test_received_tensors_alias_the_frame_buffer():
+    """Tensors are rebuilt on top of the received buffer instead of being copied out of it."""
+    frames = serialize("test", {"tens": torch.zeros(4)})
+    received = bytearray(frames[2])
+    _, recovered = deserialize([frames[0], frames[1], received])
+    recovered["tens"][0] = 1.0
+    assert np.frombuffer(received, dtype=np.float32)[0] == 1.0
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="requires CUDA")
+def test_cuda_tensors_go_out_of_band():
+    """Tensors on other devices are copied to the CPU once and come back on their device."""
+    data = {"tens": torch.randn(64, 64, device="cuda")}
+    frames = serialize("test", data)
+    assert len(frames) == 3
+    _, recovered = deserialize(frames)
+    assert recovered["tens"].device == data["tens"].device
+    assert torch.equal(recovered["tens"], data["tens"])
+
+def test_tensors_without_numpy_equivalent_are_pickled_by_torch():
+    """Tensors numpy cannot represent fall back to torch's pickling; later payloads are unaffected."""
+    data = {"bf16": torch.ones(3, dtype=torch.bfloat16), "grad": torch.ones(3, requires_grad=True)}
+    _, recovered = deserialize(serialize("test", data))
+    assert recovered["bf16"].dtype == torch.bfloat16
+    assert recovered["grad"].requires_grad
+
+    with pytest.raises(TypeError):
+        serialize("test", {"tens": torch.ones(3), "lock": threading.Lock()})
+    frames = serialize("test", {"tens": torch.ones(3)})
+    assert len(frames) == 3
+    _, recovered = deserialize(frames)
+    assert torch.equal(recovered["tens"], torch.ones(3))
+
+def test_cyclic_payload_round_trips():
+    """Cyclic payloads containing tensors round-trip with their cycles intact."""
+    data = {"tens": torch.ones(3), "items": [1, 2]}
+    data["items"].append(data["items"])
+
+    _, recovered = deserialize(serialize("test", data))
+    assert recovered["items"][2] is recovered["items"]
+    assert torch.equal(recovered["tens"], data["tens"])
+
+def test_shared_objects_are_sent_once():
+    """Objects referenced several times are pickled once and keep their identity."""
+    arr = np.zeros(1024)
+    items = [1, 2]
+    data = {"arrays": [arr] * 4, "x": items, "y": items, "tens": torch.ones(3)}
+    frames = serialize("test", data)
+    assert len(frames) == 4  # Topic + Pickle + one buffer for arr + one for the tensor
+
+    _, recovered = deserialize(frames)
+    assert all(a is recovered["arrays"][0] for a in recovered["arrays"])
+    assert recovered["x"] is recovered["y"]
+
+def test_out_of_band_buffers_are_flat_bytes():
+    """Out-of-band buffers are sent as 1-D byte frames, whatever the array layout."""
+    data = {"c": np.random.rand(3, 4), "f": np.asfortranarray(np.random.rand(3, 4))}
+    frames = serialize("test", data)
+    assert len(frames) == 4
+    for frame in frames[2:]:
+        view = memoryview(frame)
+        assert view.ndim == 1 and view.format == "B"
+        assert view.nbytes == 3 * 4 * 8
+
+    _, recovered = deserialize(frames)
+    assert np.array_equal(recovered["c"], data["c"])
+    assert np.array_equal(recovered["f"], data["f"])
+    assert recovered["f"].flags.f_contiguous
+
+def test_bare_array_skips_pickle():
+    """A bare numpy array or torch tensor is sent as a header frame and a raw data frame."""
+    arr = np.random.rand(4, 5).astype(np.float32)
+    frames = serialize("test", arr)
+    assert len(frames) == 3
+    assert frames[1].startswith(b"\x00NDARR")
+    assert memoryview(frames[2]).nbytes == arr.nbytes
+
+    recovered_topic, recovered = deserialize(frames)
+    assert recovered_topic == "test"
+    assert recovered.dtype == arr.dtype
+    assert np.array_equal(recovered, arr)
+
+    tens = torch.randn(3, 7)
+    frames = serialize("test", tens)
+    assert frames[1].startswith(b"\x00TORCH")
+    _, recovered = deserialize(frames)
+    assert torch.equal(recovered, tens)
+
+    # Non-contiguous arrays fall back to pickle
+    frames = serialize("test", arr.T)
+    assert not frames[1].startswith(b"\x00NDARR")
+    _, recovered = deserialize(frames)
+    assert np.array_equal(recovered, arr.T)
+
+def test_array_decoder_rejects_layout_changes():
+    """A specialized decoder only applies to messages with the same dtype and shape."""
+    arr = np.arange(12, dtype=np.float32).reshape(3, 4)
+    decode = array_decoder(serialize("test", arr))
+    assert decode is not None
+
+    assert np.array_equal(decode(serialize("test", arr + 1)), arr + 1)
+    assert decode(serialize("test", arr.reshape(4, 3))) is None
+    assert decode(serialize("test", arr.view(np.int32))) is None
+    assert decode(serialize("test", {"not": "an array"})) is None
+    assert array_decoder(serialize("test", {"not": "an array"})) is None
+
+def test_msgpack_round_trips_with_out_of_band_arrays():
+    """msgpack payloads keep arrays/tensors out-of-band and fall back to pickle when needed."""
+    pytest.importorskip("msgpack")
+    data = {
+        "count": 3,
+        "name": "cam",
+        "raw": b"\x00\x01",
+        "ids": {1: [1.5, None, True]},
+        "image": np.arange(12, dtype=np.uint8).reshape(3, 4),
+        "embedding": torch.randn(8),
+    }
+    frames = serialize("test", data, use_msgpack=True)
+    assert frames[1] == b"\x00MSGPK"
+    assert len(frames) == 5
+
+    recovered_topic, recovered = deserialize(frames)
+    assert recovered_topic == "test"
+    assert recovered.keys() == data.keys()
+    assert recovered["ids"] == data["ids"]
+    assert recovered["raw"] == data["raw"]
+    assert np.array_equal(recovered["image"], data["image"])
+    assert torch.equal(recovered["embedding"], data["embedding"])
+
+    # msgpack would turn tuples into lists, so they go through pickle instead
+    frames = serialize("test", {"pair": (1, 2)}, use_msgpack=True)
+    assert frames[1] != b"\x00MSGPK"
+    assert deserialize(frames)[1] == {"pair": (1, 2)}
+
+    # ... and so do bytearrays, which msgpack would turn into bytes
+    frames = serialize("test", {"b": [bytearray(b"xy")]}, use_msgpack=True)
+    assert frames[1] != b"\x00MSGPK"
+    assert deserialize(frames)[1] == {"b": [bytearray(b"xy")]}
+    assert type(deserialize(frames)[1]["b"][0]) is bytearray
+    # msgpack cannot pack cycles, so cyclic payloads fall back to pickle and keep their cycle
+    data = {"items": [1]}
+    data["items"].append(data["items"])
+    frames = serialize("test", data, use_msgpack=True)
+    assert frames[1] != b"\x00MSGPK"
+    recovered = deserialize(frames)[1]
+    assert recovered["items"][1] is recovered["items"]
+    # memoryviews cannot be pickled, so they fail the same way as without msgpack
+    with pytest.raises(TypeError):
+        serialize("test", {"b": memoryview(b"xy")}, use_msgpack=True)
+
+def test_unified_deserialization_handles_legacy_frames(legacy_frames):
     """
     Test that the new unified deserialize() function can handle 
     the list of frames produced by serialize(..., legacy=True).
     """
-    data = {"foo": "bar"}
-    topic = "legacy_test"
-    legacy_frames = serialize(topic, data, legacy=True)
-    
     # Unified deserialize should handle [topic, pickle_data] just fine
     recovered_topic, recovered_data = deserialize(legacy_frames)
-    assert recovered_topic == topic
-    assert recovered_data == data
+    assert recovered_topic == LEGACY_TOPIC
+    assert recovered_data == LEGACY_DATA
+
+def test_deserialize_accepts_zmq_frames():
+    """Frames received with copy=False are zmq.Frame objects, not bytes."""
+    import zmq
+
+    data = {"img": np.arange(12, dtype=np.int64).reshape(3, 4), "name": "cam"}
+    frames = [zmq.Frame(bytes(memoryview(f))) for f in serialize("test", data)]
+
+    recovered_topic, recovered_data = deserialize(frames)
+    assert recovered_topic == "test"
+    assert recovered_data["name"] == "cam"
+    assert np.array_equal(recovered_data["img"], data["img"])